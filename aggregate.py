@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+import loader
+
+
+class Sketch:
+    # Log-bucketed quantile sketch: every quantile is within `accuracy`
+    # relative error, and the bucket count only grows with the log of the
+    # value range, not with the number of samples.
+    def __init__(self, accuracy=0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def _add(self, buckets, magnitudes):
+        index = np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+        keys, counts = np.unique(index, return_counts=True)
+        for k, c in zip(keys.tolist(), counts.tolist()):
+            buckets[k] = buckets.get(k, 0) + c
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.zeros += int(np.count_nonzero(values == 0))
+        if np.any(values > 0):
+            self._add(self.positive, values[values > 0])
+        if np.any(values < 0):
+            self._add(self.negative, -values[values < 0])
+
+    def _value(self, k):
+        return 2 * self.gamma**k / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return self._value(k)
+        return math.nan
+
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+
+def samples(file, chunk=1 << 22):
+    # loader.rows rejects ragged rows, naming the line, so a truncated line
+    # cannot pair a tick with another row's fields.
+    for rows in loader.rows(file, object, chunk):
+        if rows.shape[1] not in (2, 3):
+            raise ValueError(f"{file}: expected 'tick [series] value' rows")
+        ticks = rows[:, 0].astype(str)
+        if rows.shape[1] == 3:
+            series = rows[:, 1].astype(str)
+        else:
+            series = np.full(len(rows), "")
+        yield ticks, series, rows[:, -1].astype(np.float64)
+
+
+def _first_seen(labels):
+    unique, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    return unique[np.argsort(first)], unique, inverse
+
+
+class Aggregate:
+    def __init__(self, accuracy=0.01):
+        self.accuracy = accuracy
+        self.ticks = {}
+        self.series = {}
+        self.sketches = {}
+
+    def update(self, ticks, series, values):
+        order_t, unique_t, ti = _first_seen(ticks)
+        order_s, unique_s, si = _first_seen(series)
+        for t in order_t.tolist():
+            self.ticks.setdefault(t, None)
+        for s in order_s.tolist():
+            self.series.setdefault(s, None)
+
+        code = ti * len(unique_s) + si
+        order = np.argsort(code, kind="stable")
+        code = code[order]
+        starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+        for chunk, c in zip(np.split(values[order], starts[1:]), code[starts].tolist()):
+            key = (str(unique_t[c // len(unique_s)]), str(unique_s[c % len(unique_s)]))
+            if key not in self.sketches:
+                self.sketches[key] = Sketch(self.accuracy)
+            self.sketches[key].update(chunk)
+
+    def value(self, key, stat):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            return math.nan
+        if stat == "mean":
+            return sketch.mean()
+        if stat == "count":
+            return sketch.count
+        if stat.startswith("p"):
+            return sketch.quantile(float(stat[1:]) / 100)
+        raise ValueError(f"unknown statistic {stat!r}")
+
+    def table(self, stat="p50", series=None):
+        series = list(self.series) if series is None else series
+        tick = list(self.ticks)
+        data = [[self.value((t, s), stat) for s in series] for t in tick]
+        return data, tick
+
+
+def read(file, accuracy=0.01):
+    agg = Aggregate(accuracy)
+    for ticks, series, values in samples(file):
+        agg.update(ticks, series, values)
+    return agg
@@ -0,0 +1,116 @@
+import os
+import traceback
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+Result = namedtuple("Result", ["name", "outputs", "error"])
+
+
+def _init(fixed_layout):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    if fixed_layout:
+        import figures
+
+        figures.set_fixed_layout(True)
+
+
+def _run(chart, cache_dir):
+    import matplotlib.pyplot as plt
+
+    import render
+
+    try:
+        return render.render(chart, cache_dir=cache_dir), None
+    except Exception:
+        return [], traceback.format_exc()
+    finally:
+        plt.close("all")
+
+
+def render_batch(charts, workers=None, cache_dir=None, fixed_layout=False):
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init, initargs=(fixed_layout,)
+    ) as pool:
+        futures = [pool.submit(_run, chart, cache_dir) for chart in charts]
+        results = []
+        for chart, future in zip(charts, futures):
+            try:
+                outputs, error = future.result()
+            except Exception:
+                outputs, error = [], traceback.format_exc()
+            results.append(Result(chart["filename"], outputs, error))
+    return results
+
+
+def _keys(chart):
+    import render
+
+    keys = {}
+    for file in render.inputs(chart):
+        read = render.reader(chart, file)
+        keys[file] = (file, read.__module__, read.__qualname__), read
+    return keys
+
+
+def _cached(chart, cache_dir):
+    import cache
+    import render
+
+    try:
+        key = cache.key(chart, render.module(chart["type"]))
+        if cache.fetch(cache_dir, key, render.outputs(chart)):
+            return [(o, os.path.getsize(o)) for o in render.outputs(chart)]
+    except Exception:
+        # Rendering reports the problem, with the chart's name.
+        pass
+    return None
+
+
+def render_pipelined(charts, prefetch=4, readers=4, cache_dir=None):
+    # Render in order on this thread while a pool parses the inputs of the
+    # next `prefetch` charts. Charts found in the cache are restored without
+    # reading anything. Each input is parsed once however many charts read
+    # it, and dropped after the last of them is rendered; an input shared
+    # with a chart further ahead than the window stays held until then.
+    import render
+
+    keys = [_keys(chart) for chart in charts]
+    remaining = Counter(key for k in keys for key, _ in k.values())
+    pending = {}
+    hits = {}
+    results = []
+    with ThreadPoolExecutor(max_workers=readers) as pool:
+
+        def submit(i):
+            if i >= len(charts) or i in hits:
+                return
+            hits[i] = _cached(charts[i], cache_dir) if cache_dir else None
+            if hits[i] is not None:
+                return
+            for key, read in keys[i].values():
+                if key not in pending:
+                    pending[key] = pool.submit(read, key[0])
+
+        for i in range(prefetch):
+            submit(i)
+        for i, chart in enumerate(charts):
+            submit(i)
+            submit(i + prefetch)
+            try:
+                if hits[i] is not None:
+                    outputs, error = hits[i], None
+                else:
+                    parsed = {
+                        f: pending[key].result() for f, (key, _) in keys[i].items()
+                    }
+                    outputs, error = render.render(chart, parsed, cache_dir), None
+            except Exception:
+                outputs, error = [], traceback.format_exc()
+            for key, _ in keys[i].values():
+                remaining[key] -= 1
+                if not remaining[key]:
+                    pending.pop(key, None)
+            results.append(Result(chart["filename"], outputs, error))
+    return results
@@ -0,0 +1,73 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+
+import figures
+import line
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def run(renders, pooled, points):
+    rng = np.random.default_rng(0)
+    xs = np.arange(points, dtype=float)
+    samples = []
+    with tempfile.TemporaryDirectory() as d:
+        ctx = figures.pooled() if pooled else contextlib.nullcontext()
+        with ctx:
+            for i in range(renders):
+                ys = rng.random(points)
+                line.draw(
+                    os.path.join(d, "chart"), [(xs, ys, "black")], width=8, height=2.5
+                )
+                if i % max(renders // 20, 1) == 0 or i == renders - 1:
+                    gc.collect()
+                    samples.append((i + 1, rss()))
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.memory")
+    parser.add_argument("-n", "--renders", type=int, default=1000)
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--pooled", action="store_true")
+    parser.add_argument(
+        "--max-growth-mb",
+        type=float,
+        default=20,
+        help="fail if RSS grows more than this",
+    )
+    args = parser.parse_args(argv)
+
+    samples = run(args.renders, args.pooled, args.points)
+    # The first few renders warm up font and glyph caches; measure from there.
+    baseline = samples[1][1] if len(samples) > 1 else samples[0][1]
+    growth = (samples[-1][1] - baseline) / 2**20
+    print(
+        json.dumps(
+            {
+                "renders": args.renders,
+                "pooled": args.pooled,
+                "rss_mb": [(n, round(b / 2**20, 1)) for n, b in samples],
+                "growth_mb": round(growth, 1),
+            }
+        )
+    )
+    return 1 if growth > args.max_growth_mb else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
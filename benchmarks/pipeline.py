@@ -0,0 +1,168 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = [10, 1000, 100000, 1000000]
+KINDS = ["draw", "line", "scatter"]
+FORMATS = ["pdf", "png"]
+# A grouped bar chart is one inch per category, so past this it cannot be
+# rendered at all; parsing is still measured.
+MAX_BARS = 1000
+
+
+def generate(kind, rows, directory):
+    import numpy as np
+
+    path = os.path.join(directory, f"{kind}-{rows}.txt")
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(rows)
+    if kind == "draw":
+        values = rng.random((rows, 4)) * 1000
+        with open(path, "w") as f:
+            f.writelines(
+                f"t{i} {' '.join(f'{v:.3f}' for v in row)}\n"
+                for i, row in enumerate(values)
+            )
+    elif kind == "line":
+        np.savetxt(path, np.c_[np.arange(1, rows + 1), rng.random(rows)], fmt="%.6g")
+    else:
+        np.savetxt(path, rng.random((rows, 2)) * [150000, 200], fmt="%.6g")
+    return path
+
+
+def _draw(kind, parsed, filename, fmt):
+    if kind == "draw":
+        import draw
+
+        data, tick = parsed
+        colors = ["black", "dimgray", "gray", "darkgray"]
+        draw.draw(data, tick, colors, filename, formats=[fmt])
+    elif kind == "line":
+        import line
+
+        xs, ys = parsed
+        line.draw(filename, [(xs, ys, "black")], width=8, height=2.5, formats=[fmt])
+    else:
+        import scatter
+
+        xs, ys = parsed
+        d = scatter.Data(xs, ys, color="gray", edgecolor="black", marker="o")
+        scatter.draw([d], filename, width=8, height=2.5, formats=[fmt])
+
+
+def case(kind, rows, fmt, directory):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import figures
+    import loader
+
+    module = importlib.import_module(kind)
+    path = generate(kind, rows, directory)
+    shutil.rmtree(os.path.join(directory, loader.CACHE_DIR), ignore_errors=True)
+
+    result = {"chart": kind, "rows": rows, "format": fmt}
+    start = time.perf_counter()
+    module.read(path)
+    result["parse_cold_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    parsed = module.read(path)
+    result["parse_warm_s"] = time.perf_counter() - start
+
+    if kind == "draw" and rows > MAX_BARS:
+        result["skipped"] = f"more than {MAX_BARS} bars"
+    else:
+        save = figures.save
+        saved = {}
+
+        def timed_save(*args, **kwargs):
+            start = time.perf_counter()
+            written = save(*args, **kwargs)
+            saved["s"] = time.perf_counter() - start
+            saved["bytes"] = sum(size for _, size in written)
+            return written
+
+        figures.save = timed_save
+        start = time.perf_counter()
+        _draw(kind, parsed, os.path.join(directory, f"out-{kind}-{rows}"), fmt)
+        total = time.perf_counter() - start
+        result["build_s"] = total - saved["s"]
+        result["savefig_s"] = saved["s"]
+        result["output_bytes"] = saved["bytes"]
+
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def run(kinds, sizes, formats, directory):
+    results = []
+    for kind in kinds:
+        for rows in sizes:
+            for fmt in formats:
+                # One process per case, so peak RSS belongs to that case only.
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.pipeline", "--case"]
+                    + [kind, str(rows), fmt, directory],
+                    capture_output=True,
+                    text=True,
+                )
+                if out.returncode:
+                    result = {"chart": kind, "rows": rows, "format": fmt}
+                    lines = out.stderr.strip().splitlines()
+                    result["error"] = lines[-1] if lines else f"exit {out.returncode}"
+                else:
+                    result = json.loads(out.stdout)
+                print(json.dumps(result), file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline")
+    parser.add_argument("-o", "--output", default="bench.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--charts", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--data-dir", help="keep generated inputs here")
+    parser.add_argument("--case", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        kind, rows, fmt, directory = args.case
+        print(json.dumps(case(kind, int(rows), fmt, directory)))
+        return 0
+
+    import matplotlib
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.abspath(args.data_dir or tmp)
+        os.makedirs(directory, exist_ok=True)
+        results = run(args.charts, args.sizes, args.formats, directory)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "matplotlib": matplotlib.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import time
+
+import matplotlib
+import numpy as np
+
+# Modules shared by every render: reading, building, decimating, styling and
+# saving. Their source is part of each key along with the chart module's.
+SHARED = ("aggregate", "decimate", "figures", "loader", "render", "variants")
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"cannot hash {type(obj).__name__}")
+
+
+def _digest(file):
+    h = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _version(module):
+    h = hashlib.sha256()
+    for name in (module.__name__,) + SHARED:
+        with open(importlib.import_module(name).__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def key(chart, module):
+    spec = {k: v for k, v in chart.items() if k not in ("filename", "input", "series")}
+    if "input" in chart:
+        spec["input"] = _digest(chart["input"])
+    if "series" in chart:
+        spec["series"] = [{**s, "input": _digest(s["input"])} for s in chart["series"]]
+    spec["version"] = _version(module)
+    spec["matplotlib"] = matplotlib.__version__
+    src = json.dumps(spec, sort_keys=True, default=_default)
+    return hashlib.sha256(src.encode()).hexdigest()
+
+
+def _entry(cache_dir, key, i, output):
+    # One chart can write several files with the same extension (its
+    # variants), so entries are numbered by their place in the outputs.
+    return os.path.join(cache_dir, f"{key}.{i}{os.path.splitext(output)[1]}")
+
+
+def fetch(cache_dir, key, outputs):
+    entries = [_entry(cache_dir, key, i, o) for i, o in enumerate(outputs)]
+    if not all(os.path.exists(e) for e in entries):
+        return False
+    for entry, output in zip(entries, outputs):
+        shutil.copyfile(entry, output)
+        os.utime(entry)
+    return True
+
+
+def store(cache_dir, key, outputs):
+    os.makedirs(cache_dir, exist_ok=True)
+    for i, output in enumerate(outputs):
+        entry = _entry(cache_dir, key, i, output)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        shutil.copyfile(output, tmp)
+        os.replace(tmp, entry)
+
+
+def evict(cache_dir, max_bytes=None, max_age=None):
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        st = os.stat(path)
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+
+    removed = []
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in entries:
+        expired = max_age is not None and now - mtime > max_age
+        oversize = max_bytes is not None and total > max_bytes
+        if not (expired or oversize):
+            continue
+        os.remove(path)
+        total -= size
+        removed.append(path)
+    return removed
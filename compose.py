@@ -0,0 +1,94 @@
+import argparse
+import sys
+
+import figures
+import render
+
+
+def _outer(ax, sharex, sharey):
+    # Shared axes only need their labels on the outer edge of the grid.
+    spec = ax.get_subplotspec()
+    if sharex and not spec.is_last_row():
+        ax.set_xlabel("")
+        ax.tick_params(axis="x", labelbottom=False)
+    if sharey and not spec.is_first_col():
+        ax.set_ylabel("")
+        ax.tick_params(axis="y", labelleft=False)
+
+
+def grid(
+    charts,
+    filename,
+    cols=1,
+    width=8,
+    height=2.5,
+    sharex=False,
+    sharey=False,
+    facecolor="white",
+    pdf=True,
+    dpi=300,
+    formats=None,
+):
+    rows = -(-len(charts) // cols)
+    fig, axes = figures.grid(
+        rows, cols, width * cols, height * rows, facecolor, sharex, sharey
+    )
+    try:
+        for chart, ax in zip(charts, axes.flat):
+            fn, kwargs = render.build(chart)
+            fn(ax=ax, **kwargs)
+            _outer(ax, sharex, sharey)
+        for ax in axes.flat[len(charts) :]:
+            ax.set_visible(False)
+        return figures.save(fig, filename, pdf, dpi, formats=formats)
+    finally:
+        figures.release(fig)
+
+
+def pages(charts, filename):
+    with figures.document(f"{filename}.pdf") as written:
+        for chart in charts:
+            render.render(chart)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m compose")
+    parser.add_argument("names", nargs="*", help="charts to compose (default: all)")
+    parser.add_argument("-m", "--manifest", default="charts.toml")
+    parser.add_argument("-o", "--output", required=True, help="output file, no suffix")
+    parser.add_argument(
+        "--pages", action="store_true", help="one PDF page per chart instead of a grid"
+    )
+    parser.add_argument("--cols", type=int, default=1)
+    parser.add_argument("--width", type=float, default=8, help="inches per panel")
+    parser.add_argument("--height", type=float, default=2.5, help="inches per panel")
+    parser.add_argument("--sharex", action="store_true")
+    parser.add_argument("--sharey", action="store_true")
+    args = parser.parse_args(argv)
+
+    charts = render.load_manifest(args.manifest)
+    try:
+        charts = render.select(charts, args.names)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if args.pages:
+        written = pages(charts, args.output)
+    else:
+        written = grid(
+            charts,
+            args.output,
+            cols=args.cols,
+            width=args.width,
+            height=args.height,
+            sharex=args.sharex,
+            sharey=args.sharey,
+        )
+    for path, size in written:
+        print(f"{size:>12,}  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
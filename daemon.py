@@ -0,0 +1,149 @@
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+
+SOCKET = os.environ.get("DRAW_CHARTS_SOCKET", f"/tmp/draw-charts-{os.getuid()}.sock")
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(raw))
+            except Exception:
+                response = {"ok": False, "error": traceback.format_exc()}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class Server(socketserver.UnixStreamServer):
+    def __init__(self, path, cache_dir=None):
+        import render
+
+        self.render = render
+        self.cache_dir = cache_dir
+        _warm_up()
+        super().__init__(path, Handler)
+
+    def dispatch(self, request):
+        if request.get("shutdown"):
+            threading.Thread(target=self.shutdown).start()
+            return {"ok": True}
+
+        chart = request["chart"]
+        if not request.get("bytes"):
+            self.render.render(chart, cache_dir=self.cache_dir)
+            return {"ok": True, "outputs": self.render.outputs(chart)}
+
+        name = os.path.basename(chart["filename"])
+        data = {
+            f"{name}.{fmt}": base64.b64encode(content).decode()
+            for fmt, content in self.render.render_bytes(chart).items()
+        }
+        return {"ok": True, "data": data}
+
+
+def _warm_up():
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(1, 1))
+    fig.add_subplot(1, 1, 1).plot([0, 1], [0, 1])
+    for fmt in ("pdf", "png"):
+        fig.savefig(io.BytesIO(), format=fmt, bbox_inches="tight")
+    plt.close(fig)
+
+
+def _claim(path):
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX) as s:
+        try:
+            s.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise OSError(f"{path}: a render server is already listening")
+
+
+def serve(path=SOCKET, cache_dir=None, fixed_layout=False):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import figures
+
+    _claim(path)
+    layout = figures.fixed_layout() if fixed_layout else contextlib.nullcontext()
+    with Server(path, cache_dir) as server, figures.pooled(), layout:
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
+
+
+def request(message, path=SOCKET):
+    with socket.socket(socket.AF_UNIX) as s:
+        s.connect(path)
+        s.sendall(json.dumps(message).encode() + b"\n")
+        with s.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def submit(chart, path=SOCKET, want_bytes=False):
+    chart = {**chart, "filename": os.path.abspath(chart["filename"])}
+    response = request({"chart": chart, "bytes": want_bytes}, path)
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    if want_bytes:
+        return {k: base64.b64decode(v) for k, v in response["data"].items()}
+    return response["outputs"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m daemon")
+    parser.add_argument("-s", "--socket", default=SOCKET)
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("serve", help="start the render server")
+    p.add_argument("--cache", metavar="DIR")
+    p.add_argument("--fixed-layout", action="store_true")
+    p = commands.add_parser("render", help="render charts through the server")
+    p.add_argument("names", nargs="*")
+    p.add_argument("-m", "--manifest", default="charts.toml")
+    p.add_argument("-o", "--output-dir", help="write returned bytes here")
+    commands.add_parser("stop", help="stop the render server")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.socket, args.cache, args.fixed_layout)
+        return 0
+    if args.command == "stop":
+        request({"shutdown": True}, args.socket)
+        return 0
+
+    import render
+
+    failed = 0
+    for chart in render.select(render.load_manifest(args.manifest), args.names):
+        try:
+            if args.output_dir:
+                outputs = submit(chart, args.socket, want_bytes=True)
+                for name, data in outputs.items():
+                    with open(os.path.join(args.output_dir, name), "wb") as f:
+                        f.write(data)
+            else:
+                outputs = submit(chart, args.socket)
+            print("\n".join(outputs))
+        except RuntimeError as e:
+            failed += 1
+            print(f"{chart['filename']}: failed\n{e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import numpy as np
+
+import loader
+
+
+def _prepare(xs, ys, xlog, ylog):
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if len(xs) > 1 and np.any(np.diff(xs) < 0):
+        return None
+    visible = np.isfinite(xs) & np.isfinite(ys)
+    if xlog:
+        visible &= xs > 0
+    if ylog:
+        visible &= ys > 0
+    runs = None
+    if not visible.all():
+        # Points between the same two gaps share a run number, the count of
+        # hidden points before them. Runs are reduced apart and rejoined with
+        # a NaN, so the line still breaks at every gap.
+        runs = np.cumsum(~visible)[visible]
+        xs, ys = xs[visible], ys[visible]
+    tx = np.log10(xs) if xlog else xs
+    ty = np.log10(ys) if ylog else ys
+    return xs, ys, tx, ty, runs
+
+
+def _join(xs, ys, keep, runs):
+    xs, ys = xs[keep], ys[keep]
+    if runs is None:
+        return xs, ys
+    breaks = np.flatnonzero(np.diff(runs[keep])) + 1
+    return np.insert(xs, breaks, np.nan), np.insert(ys, breaks, np.nan)
+
+
+def _columns(tx, bins, lo, hi, runs=None):
+    span = hi - lo
+    if span <= 0:
+        col = np.zeros(len(tx), dtype=np.intp)
+    else:
+        col = np.minimum(((tx - lo) * (bins / span)).astype(np.intp), bins - 1)
+    # A pixel column split by a gap is one column per side, so both ends of
+    # every run are kept.
+    return col if runs is None else col + runs * bins
+
+
+def _first(mask, col):
+    hits = np.flatnonzero(mask)
+    c = col[hits]
+    return hits[np.r_[True, c[1:] != c[:-1]]]
+
+
+def _extremes(xs, ys, col):
+    # Within each pixel column keep the first, last, lowest and highest point,
+    # so every visible extreme survives and the path enters/leaves correctly.
+    starts = np.flatnonzero(np.r_[True, col[1:] != col[:-1]])
+    ends = np.r_[starts[1:], len(col)] - 1
+    counts = ends - starts + 1
+    lows = _first(ys == np.repeat(np.minimum.reduceat(ys, starts), counts), col)
+    highs = _first(ys == np.repeat(np.maximum.reduceat(ys, starts), counts), col)
+    return np.unique(np.concatenate([starts, ends, lows, highs]))
+
+
+def _chunks(n):
+    return [slice(i, i + loader.CHUNK) for i in range(0, n, loader.CHUNK)]
+
+
+def _minmax_chunked(xs, ys, bins, xlog, ylog):
+    # Two passes over CHUNK rows at a time, so a memory-mapped series is
+    # never loaded whole: one for the x range, one to reduce each chunk.
+    lo = hi = last = None
+    for part in _chunks(len(xs)):
+        prepared = _prepare(xs[part], ys[part], xlog, ylog)
+        if prepared is None:
+            return None
+        tx = prepared[2]
+        if len(tx):
+            if last is not None and tx[0] < last:
+                return None
+            lo = tx[0] if lo is None else lo
+            hi = last = tx[-1]
+    if lo is None:
+        return None
+
+    kept = []
+    gap = False
+    for part in _chunks(len(xs)):
+        cx, cy, tx, _, runs = _prepare(xs[part], ys[part], xlog, ylog)
+        if not len(tx):
+            gap = True
+            continue
+        if kept and (gap or (runs is not None and runs[0])):
+            kept.append((np.array([np.nan]), np.array([np.nan])))
+        keep = _extremes(cx, cy, _columns(tx, bins, lo, hi, runs))
+        kept.append(_join(cx, cy, keep, runs))
+        gap = runs is not None and len(xs[part]) - len(tx) > runs[-1]
+    return np.concatenate([k[0] for k in kept]), np.concatenate([k[1] for k in kept])
+
+
+def minmax(xs, ys, bins, xlog=False, ylog=False):
+    if len(xs) > loader.CHUNK:
+        reduced = _minmax_chunked(xs, ys, bins, xlog, ylog)
+        return (xs, ys) if reduced is None else reduced
+
+    prepared = _prepare(xs, ys, xlog, ylog)
+    if prepared is None or len(prepared[0]) <= 4 * bins:
+        return xs, ys
+    xs, ys, tx, _, runs = prepared
+    keep = _extremes(xs, ys, _columns(tx, bins, tx[0], tx[-1], runs))
+    return _join(xs, ys, keep, runs)
+
+
+def _lttb(tx, ty, n_out):
+    n = len(tx)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx = tx[nlo:nhi].mean()
+        cy = ty[nlo:nhi].mean()
+        area = np.abs(
+            (tx[a] - cx) * (ty[lo:hi] - ty[a]) - (tx[a] - tx[lo:hi]) * (cy - ty[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def lttb(xs, ys, n_out, xlog=False, ylog=False):
+    if len(xs) > loader.CHUNK:
+        # Narrow a huge series to its per-pixel extremes first; LTTB then
+        # picks among those instead of walking every row.
+        xs, ys = minmax(xs, ys, n_out, xlog, ylog)
+    prepared = _prepare(xs, ys, xlog, ylog)
+    if prepared is None or len(prepared[0]) <= n_out or n_out < 3:
+        return xs, ys
+    xs, ys, tx, ty, runs = prepared
+    if runs is None:
+        keep = _lttb(tx, ty, n_out)
+    else:
+        # Each run gets a share of the points in proportion to its length.
+        starts = np.flatnonzero(np.r_[True, runs[1:] != runs[:-1]])
+        ends = np.r_[starts[1:], len(runs)]
+        keep = np.concatenate(
+            [
+                i + _lttb(tx[i:j], ty[i:j], max(3, n_out * (j - i) // len(runs)))
+                for i, j in zip(starts.tolist(), ends.tolist())
+            ]
+        )
+    return _join(xs, ys, keep, runs)
+
+
+def decimate(xs, ys, columns, method="minmax", xlog=False, ylog=False):
+    if method in (True, "minmax"):
+        return minmax(xs, ys, columns, xlog, ylog)
+    if method == "lttb":
+        return lttb(xs, ys, 2 * columns, xlog, ylog)
+    raise ValueError(f"unknown downsampling method {method!r}")
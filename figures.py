@@ -0,0 +1,429 @@
+import contextlib
+import functools
+import heapq
+import io
+import math
+import os
+import pickle
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.cbook import is_math_text
+from matplotlib.collections import Collection, PolyCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
+from matplotlib.textpath import text_to_path
+from matplotlib.transforms import Bbox
+
+import instrument
+
+POOL = "draw-charts-pool"
+FORMATS = ("pdf", "png", "svg")
+PAD = 0.05
+# Longest category labels measured when thinning tick labels.
+LABEL_SAMPLE = 20
+MAX_LAYOUTS = 256
+
+_pooled = False
+_fixed = False
+_document = None
+_layouts = {}
+
+
+def _attach(fig):
+    trace = instrument.current()
+    owned = trace is None
+    if owned:
+        trace = instrument.begin()
+    fig._draw_charts_trace = (trace, owned)
+
+
+def new(width, height, facecolor, ax=None):
+    # Drawing into an axes someone else owns: that caller lays out, saves and
+    # releases the figure, so there is no figure to hand back.
+    if ax is not None:
+        ax.set_facecolor(facecolor)
+        return None, ax
+
+    if _pooled:
+        fig = plt.figure(num=POOL)
+        fig.clf()
+        fig.set_size_inches(width, height)
+        fig.set_facecolor(facecolor)
+    else:
+        fig = plt.figure(figsize=(width, height), facecolor=facecolor)
+    ax = fig.add_subplot(1, 1, 1, facecolor=facecolor)
+    _attach(fig)
+    return fig, ax
+
+
+def grid(rows, cols, width, height, facecolor, sharex=False, sharey=False):
+    fig = plt.figure(
+        figsize=(width, height), facecolor=facecolor, layout="constrained"
+    )
+    axes = fig.subplots(rows, cols, sharex=sharex, sharey=sharey, squeeze=False)
+    _attach(fig)
+    return fig, axes
+
+
+def release(fig):
+    if fig is None:
+        return
+    trace, owned = fig.__dict__.pop("_draw_charts_trace", (None, False))
+    if _pooled and fig.get_label() == POOL:
+        fig.clf()
+    else:
+        plt.close(fig)
+    if owned:
+        trace.mark("release")
+        instrument.finish(trace)
+
+
+def rectangles(x0, y0, x1, y1, facecolors):
+    x0, y0, x1, y1 = np.broadcast_arrays(x0, y0, x1, y1)
+    verts = np.stack(
+        [
+            np.stack(corner, axis=-1)
+            for corner in [(x0, y0), (x0, y1), (x1, y1), (x1, y0)]
+        ],
+        axis=-2,
+    )
+    return PolyCollection(verts, facecolors=facecolors, edgecolors="none", linewidths=0)
+
+
+def style_axes(
+    ax,
+    legend,
+    legend_loc,
+    legend_bbox,
+    fontsize,
+    facecolor,
+    labelcolor,
+    tickcolor,
+    bordercolor,
+    tickwidth,
+    borderwidth,
+    borders,
+):
+    # Everything about the frame that a style variant may change; applying
+    # it again to a built axes gives what a fresh draw with it would.
+    ax.set_facecolor(facecolor)
+    if legend:
+        ax.legend(fontsize=fontsize, loc=legend_loc, bbox_to_anchor=legend_bbox)
+    elif ax.get_legend() is not None:
+        ax.get_legend().remove()
+
+    for label in (ax.xaxis.label, ax.yaxis.label):
+        label.set_color(labelcolor)
+        label.set_fontsize(fontsize)
+
+    ax.tick_params(axis="x", labelsize=fontsize, colors=tickcolor, width=tickwidth)
+    ax.tick_params(axis="y", labelsize=fontsize, colors=tickcolor, width=tickwidth)
+
+    for b in ["left", "right", "top", "bottom"]:
+        ax.spines[b].set_visible(b in borders)
+        if b in borders:
+            ax.spines[b].set_color(bordercolor)
+            ax.spines[b].set_linewidth(borderwidth)
+
+
+@functools.lru_cache(maxsize=4096)
+def _extent(text, fontsize, family):
+    prop = FontProperties(family=list(family), size=fontsize)
+    w, h, _ = text_to_path.get_text_width_height_descent(
+        text, prop, ismath=is_math_text(text)
+    )
+    return w, h
+
+
+def label_step(labels, span, fontsize, rotation=0, pad=2):
+    # Show every step-th of these evenly spaced category labels so that
+    # neighbours along `span` points do not overlap. Only the longest
+    # labels are measured, and each string once, so the cost stays flat
+    # however many categories there are.
+    if len(labels) < 2:
+        return 1
+    family = tuple(plt.rcParams["font.family"])
+    longest = heapq.nlargest(LABEL_SAMPLE, map(str, labels), key=len)
+    extents = [_extent(text, fontsize, family) for text in longest]
+    sin, cos = abs(math.sin(math.radians(rotation))), abs(
+        math.cos(math.radians(rotation))
+    )
+    # Rotated neighbours are parallel, so they clear each other once their
+    # perpendicular distance exceeds one line height, or once the whole
+    # rotated extents side by side do.
+    need = max(w * cos + h * sin for w, h in extents)
+    if sin > 0.1:
+        need = min(need, max(h for _, h in extents) / sin)
+    return max(1, math.ceil((need + pad) * len(labels) / span))
+
+
+def _elements(artist):
+    if isinstance(artist, Line2D):
+        return len(artist.get_xydata())
+    if isinstance(artist, Collection):
+        return max(len(artist.get_offsets()), len(artist.get_paths()))
+    return 1
+
+
+def rasterize(fig, threshold):
+    count = 0
+    for ax in fig.axes:
+        for artist in [*ax.lines, *ax.collections]:
+            if _elements(artist) > threshold:
+                artist.set_rasterized(True)
+                count += 1
+        for container in ax.containers:
+            patches = getattr(container, "patches", ())
+            if len(patches) > threshold:
+                for patch in patches:
+                    patch.set_rasterized(True)
+                count += 1
+    return count
+
+
+def _count(fig):
+    counts = {"lines": 0, "collections": 0, "patches": 0, "elements": 0}
+    for ax in fig.axes:
+        counts["lines"] += len(ax.lines)
+        counts["collections"] += len(ax.collections)
+        counts["patches"] += len(ax.patches)
+        counts["elements"] += sum(map(_elements, [*ax.lines, *ax.collections]))
+    counts["texts"] = sum(t.get_visible() for t in fig.findobj(Text))
+    return counts
+
+
+def _layout_key(fig, kwargs):
+    # The tight bbox is the union of everything that can reach past the axes:
+    # data artists are clipped to them, so only the frames, spines, tick and
+    # axis labels, legends and free texts count, and those measure without
+    # drawing. Figures whose union rounds the same share one layout.
+    get_renderer = getattr(fig.canvas, "get_renderer", None)
+    if get_renderer is None:
+        return None
+    renderer = get_renderer()
+    boxes = [t.get_window_extent(renderer) for t in fig.texts]
+    titles = []
+    for ax in fig.axes:
+        boxes.append(ax.bbox)
+        boxes += [s.get_window_extent(renderer) for s in ax.spines.values()]
+        boxes += [axis.get_tightbbox(renderer) for axis in (ax.xaxis, ax.yaxis)]
+        if ax.get_legend() is not None:
+            boxes.append(ax.get_legend().get_window_extent(renderer))
+        boxes += [t.get_window_extent(renderer) for t in ax.texts]
+        titles += [ax.get_title(loc) for loc in ("left", "center", "right")]
+        titles.append(ax.title.get_fontsize())
+    union = Bbox.union([b for b in boxes if b is not None])
+    extents = tuple(round(float(v) * 72 / fig.dpi, 1) for v in union.extents)
+    size = tuple(fig.get_size_inches().tolist())
+    return kwargs["format"], kwargs.get("dpi"), size, extents, tuple(titles)
+
+
+def _savefig(fig, fn, trace, **kwargs):
+    key = _layout_key(fig, kwargs) if _fixed else None
+    bbox = _layouts.get(key)
+    if bbox is not None:
+        trace.mark("layout")
+        fig.savefig(fn, bbox_inches=bbox.padded(PAD), **kwargs)
+        trace.mark("write")
+        return bbox
+
+    # savefig(bbox_inches="tight") draws the figure once just to measure it;
+    # catching the measurement lets the trace split layout from writing.
+    get_tightbbox = fig.get_tightbbox
+
+    def measure(*args, **kw):
+        nonlocal bbox
+        bbox = get_tightbbox(*args, **kw)
+        trace.mark("layout")
+        return bbox
+
+    fig.get_tightbbox = measure
+    try:
+        fig.savefig(fn, bbox_inches="tight", pad_inches=PAD, **kwargs)
+    finally:
+        del fig.get_tightbbox
+    trace.mark("write")
+    if key is not None and bbox is not None:
+        if len(_layouts) >= MAX_LAYOUTS:
+            del _layouts[next(iter(_layouts))]
+        _layouts[key] = bbox
+    return bbox
+
+
+def _copy(fig):
+    # Writers mutate the figure they draw (dpi, bbox, tick state), so every
+    # concurrent write gets its own copy of the artist tree.
+    state = fig.__dict__.pop("_draw_charts_trace", None)
+    try:
+        copy = pickle.loads(pickle.dumps(fig))
+    finally:
+        if state is not None:
+            fig._draw_charts_trace = state
+    # Unpickling registers the copy with pyplot again.
+    plt.close(copy)
+    return copy
+
+
+def _options(fmt, dpi, rasterized, rasterize_dpi):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown output format {fmt!r}")
+    if fmt == "png":
+        return {"format": fmt, "dpi": dpi}
+    if rasterized:
+        return {"format": fmt, "dpi": rasterize_dpi}
+    return {"format": fmt}
+
+
+def _targets(filename, formats):
+    # A path stem gets one file per format, a file object takes its single
+    # format, and a {format: file object} mapping takes one of each.
+    if isinstance(filename, Mapping):
+        return list(filename.items())
+    if hasattr(filename, "write"):
+        if len(formats) != 1:
+            raise ValueError(f"one file object cannot hold formats {formats}")
+        return [(formats[0], filename)]
+    return [(fmt, f"{filename}.{fmt}") for fmt in formats]
+
+
+def _tell(f):
+    try:
+        return f.tell()
+    except (AttributeError, OSError):
+        return None
+
+
+def save(
+    fig,
+    filename,
+    pdf=True,
+    dpi=300,
+    rasterize_threshold=None,
+    rasterize_dpi=300,
+    formats=None,
+):
+    if fig is None:
+        return []
+    trace = fig.__dict__.get("_draw_charts_trace", (None,))[0]
+    if trace is None:
+        trace = instrument.Trace()
+    if isinstance(filename, (str, os.PathLike)):
+        trace.chart = trace.chart or str(filename)
+    trace.mark("build")
+
+    formats = formats or ["pdf" if pdf else "png"]
+    targets = _targets(filename, formats)
+    formats = [fmt for fmt, _ in targets]
+    rasterized = (
+        rasterize_threshold is not None
+        and (_document is not None or any(fmt != "png" for fmt in formats))
+        and rasterize(fig, rasterize_threshold) > 0
+    )
+    if _document is not None:
+        # One page of the open document instead of files of its own.
+        kwargs = _options("pdf", dpi, rasterized, rasterize_dpi)
+        _savefig(fig, _document, trace, **kwargs)
+        return []
+    jobs = [
+        (target, _options(fmt, dpi, rasterized, rasterize_dpi))
+        for fmt, target in targets
+    ]
+    starts = [None if isinstance(t, str) else _tell(t) for _, t in targets]
+
+    # The first format measures the layout; the others reuse its bbox and are
+    # written side by side from copies of the same figure.
+    fn, kwargs = jobs[0]
+    bbox = _savefig(fig, fn, trace, **kwargs)
+    if len(jobs) > 1:
+        try:
+            copies = [_copy(fig) for _ in jobs[1:]]
+        except (pickle.PicklingError, TypeError, AttributeError):
+            copies = [fig] * (len(jobs) - 1)
+
+        def write(copy, job):
+            copy.savefig(job[0], bbox_inches=bbox.padded(PAD), **job[1])
+
+        if copies[0] is fig:
+            for copy, job in zip(copies, jobs[1:]):
+                write(copy, job)
+        else:
+            with ThreadPoolExecutor(len(copies)) as pool:
+                list(pool.map(write, copies, jobs[1:]))
+        trace.mark("write")
+
+    written = []
+    for (fmt, target), start in zip(targets, starts):
+        if isinstance(target, str):
+            name, size = target, os.path.getsize(target)
+        else:
+            # Traces are dumped as JSON, so they name file objects instead.
+            name, end = getattr(target, "name", f"<{fmt}>"), _tell(target)
+            size = None if start is None or end is None else end - start
+        written.append((target, size))
+        trace.outputs.append((name, size))
+    if instrument.enabled():
+        trace.artists = _count(fig)
+        trace.skip()
+    return written
+
+
+@contextlib.contextmanager
+def pooled():
+    global _pooled
+    prev = _pooled
+    _pooled = True
+    try:
+        yield
+    finally:
+        _pooled = prev
+        if not prev:
+            plt.close(POOL)
+
+
+def set_fixed_layout(enabled):
+    # Reuse the tight bbox of an earlier figure whose frame and labels
+    # measure the same, instead of drawing every figure twice. Returns the
+    # previous setting; turning the mode off forgets measured layouts.
+    global _fixed
+    prev = _fixed
+    _fixed = enabled
+    if not enabled:
+        _layouts.clear()
+    return prev
+
+
+@contextlib.contextmanager
+def fixed_layout():
+    prev = set_fixed_layout(True)
+    try:
+        yield
+    finally:
+        set_fixed_layout(prev)
+
+
+@contextlib.contextmanager
+def document(filename):
+    # Every figure saved inside becomes a page of one PDF, which embeds each
+    # font once for the whole document.
+    global _document
+    prev = _document
+    written = []
+    with PdfPages(filename) as pages:
+        _document = pages
+        try:
+            yield written
+        finally:
+            _document = prev
+    written.append((filename, os.path.getsize(filename)))
+
+
+def render_bytes(draw, *args, formats=("pdf",), **kwargs):
+    # Any chart module's draw(), rendered into memory: {format: bytes}.
+    buffers = {fmt: io.BytesIO() for fmt in formats}
+    draw(*args, filename=buffers, **kwargs)
+    return {fmt: buf.getvalue() for fmt, buf in buffers.items()}
@@ -0,0 +1,90 @@
+import cProfile
+import fnmatch
+import json
+import os
+import threading
+import time
+
+TRACE = os.environ.get("DRAW_CHARTS_TRACE")
+PROFILE = os.environ.get("DRAW_CHARTS_PROFILE")
+
+_hooks = []
+_local = threading.local()
+
+
+class Trace:
+    def __init__(self, chart=None, profile=False):
+        self.chart = chart
+        self.stages = {}
+        self.artists = {}
+        self.outputs = []
+        self.profile = cProfile.Profile() if profile else None
+        self._last = time.perf_counter()
+        if self.profile:
+            self.profile.enable()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def skip(self):
+        self._last = time.perf_counter()
+
+    def record(self):
+        return {
+            "chart": self.chart,
+            "stages": self.stages,
+            "total": sum(self.stages.values()),
+            "artists": self.artists,
+            "outputs": self.outputs,
+        }
+
+
+def add_hook(hook):
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def enabled():
+    return bool(_hooks) or bool(PROFILE)
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def _profiled(chart):
+    if not (PROFILE and chart):
+        return False
+    return fnmatch.fnmatch(os.path.basename(chart), PROFILE)
+
+
+def begin(chart=None):
+    trace = Trace(chart, profile=_profiled(chart))
+    _local.trace = trace
+    return trace
+
+
+def finish(trace):
+    if current() is trace:
+        _local.trace = None
+    if trace.profile:
+        trace.profile.disable()
+        trace.profile.dump_stats(f"{trace.chart}.prof")
+    record = trace.record()
+    for hook in list(_hooks):
+        hook(record)
+    return record
+
+
+def _dump(record):
+    with open(TRACE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+if TRACE:
+    add_hook(_dump)
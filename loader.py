@@ -0,0 +1,192 @@
+import argparse
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+import re
+import shutil
+import sys
+
+import numpy as np
+
+CACHE_DIR = "__chartcache__"
+# Rows handled at a time wherever a whole input need not be in memory.
+CHUNK = 1 << 20
+NPY_MAGIC = b"\x93NUMPY"
+COMPRESSED = [
+    (re.compile(rb"\x1f\x8b"), ".gz", gzip),
+    (re.compile(rb"\xfd7zXZ\x00"), ".xz", lzma),
+    (re.compile(rb"BZh[1-9](1AY&SY|\x17rE8P\x90)"), ".bz2", bz2),
+]
+
+
+def _key(file):
+    st = os.stat(file)
+    src = f"{os.path.abspath(file)}\0{st.st_size}\0{st.st_mtime_ns}"
+    return hashlib.sha1(src.encode()).hexdigest()[:16]
+
+
+def _sidecar(file):
+    path = os.path.abspath(file)
+    d = os.path.join(os.path.dirname(path), CACHE_DIR)
+    return d, os.path.basename(path)
+
+
+def open_text(file):
+    # Compressed inputs are recognised by their magic bytes, or failing that
+    # their extension, and decompressed as they are read.
+    with open(file, "rb") as f:
+        head = f.read(10)
+    codec = next((c for magic, _, c in COMPRESSED if magic.match(head)), None)
+    if codec is None:
+        codec = next((c for _, ext, c in COMPRESSED if file.endswith(ext)), None)
+    return codec.open(file, "rt") if codec else open(file, "r")
+
+
+def _bad_line(file, lines, lineno, ncols, dtype):
+    # Only reached for malformed input, so a line-by-line scan is fine here.
+    for i, line in enumerate(lines, lineno + 1):
+        row = line.split()
+        if not row:
+            continue
+        ncols = ncols or len(row)
+        if len(row) != ncols:
+            return ValueError(f"{file}:{i}: expected {ncols} columns, got {len(row)}")
+        try:
+            np.array(row, dtype=dtype)
+        except ValueError as e:
+            return ValueError(f"{file}:{i}: {e}")
+    return None
+
+
+def rows(file, dtype=object, chunk=1 << 22):
+    # Whole lines a chunk at a time, so neither the text nor its tokens are
+    # ever held for the whole file. Labeled rows come back as objects: a str
+    # dtype makes loadtxt slower and warn about blank lines.
+    ncols = None
+    lineno = 0
+    with open_text(file) as f:
+        while True:
+            lines = f.readlines(chunk)
+            if not lines:
+                return
+            if not "".join(lines).isspace():
+                try:
+                    block = np.loadtxt(lines, dtype=dtype, ndmin=2, comments=None)
+                except ValueError as e:
+                    raise _bad_line(file, lines, lineno, ncols, dtype) or e
+                if ncols is not None and block.shape[1] != ncols:
+                    raise _bad_line(file, lines, lineno, ncols, dtype)
+                ncols = block.shape[1]
+                yield block
+            lineno += len(lines)
+
+
+def _parse(file, labeled):
+    labels, values = [], []
+    for block in rows(file, object if labeled else np.float64):
+        if labeled:
+            labels.append(block[:, 0].astype(str))
+            block = block[:, 1:]
+        values.append(block.astype(np.float64))
+    if not values:
+        return (np.empty(0, dtype=str) if labeled else None), np.empty((0, 0))
+    return (np.concatenate(labels) if labeled else None), np.concatenate(values)
+
+
+def _save(path, arr):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def _paths(d, base, key, labeled):
+    stem = os.path.join(d, f"{base}.{key}")
+    if labeled:
+        return f"{stem}.values.npy", f"{stem}.labels.npy"
+    return f"{stem}.npy", None
+
+
+def _store(file, key, labels, values):
+    d, base = _sidecar(file)
+    values_path, labels_path = _paths(d, base, key, labels is not None)
+    try:
+        os.makedirs(d, exist_ok=True)
+        stale = re.compile(re.escape(base) + r"\.[0-9a-f]{16}\.(\w+\.)?npy")
+        for name in os.listdir(d):
+            if stale.fullmatch(name) and key not in name:
+                os.remove(os.path.join(d, name))
+        _save(values_path, values)
+        if labels_path:
+            _save(labels_path, labels)
+    except OSError:
+        pass
+
+
+def _binary(file):
+    with open(file, "rb") as f:
+        return f.read(len(NPY_MAGIC)) == NPY_MAGIC
+
+
+def load(file, labeled=False):
+    if _binary(file):
+        if labeled:
+            raise ValueError(f"{file}: labeled input must be text")
+        values = np.load(file, mmap_mode="r")
+        if values.ndim != 2:
+            raise ValueError(f"{file}: expected a 2-D array, got {values.shape}")
+        return values
+
+    key = _key(file)
+    d, base = _sidecar(file)
+    values_path, labels_path = _paths(d, base, key, labeled)
+    try:
+        values = np.load(values_path, mmap_mode="r")
+        labels = np.load(labels_path, mmap_mode="r") if labeled else None
+    except (OSError, ValueError):
+        labels, values = _parse(file, labeled)
+        _store(file, key, labels, values)
+    return (labels, values) if labeled else values
+
+
+def convert(src, dst=None):
+    # Streams the text through a raw temporary file, so the conversion needs
+    # no more memory than one chunk; the .npy header is written once the row
+    # count is known.
+    dst = dst or os.path.splitext(src)[0] + ".npy"
+    raw = f"{dst}.{os.getpid()}.raw"
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    rows, ncols = 0, 0
+    try:
+        with open(raw, "wb") as f:
+            for values in rows(src, np.float64):
+                rows, ncols = rows + len(values), values.shape[1]
+                values.astype("<f8").tofile(f)
+        header = {"descr": "<f8", "fortran_order": False, "shape": (rows, ncols)}
+        with open(tmp, "wb") as out, open(raw, "rb") as f:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(f, out, 1 << 24)
+        os.replace(tmp, dst)
+    finally:
+        for path in (raw, tmp):
+            if os.path.exists(path):
+                os.remove(path)
+    return dst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loader")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("convert", help="convert text columns to .npy")
+    p.add_argument("src")
+    p.add_argument("dst", nargs="?", help="default: SRC with a .npy suffix")
+    args = parser.parse_args(argv)
+
+    print(convert(args.src, args.dst))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
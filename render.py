@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import sys
+
+TYPES = ("draw", "line", "scatter", "stack")
+SPEC_KEYS = {"type", "input", "series", "aggregate", "variants"}
+
+
+def module(kind):
+    # Chart modules pull in pyplot, so they are only imported once needed.
+    # Charts also arrive over the daemon's socket, so the type is checked
+    # here rather than trusted.
+    if kind not in TYPES:
+        raise ValueError(f"unknown chart type {kind!r}")
+    return importlib.import_module(kind)
+
+
+def load_manifest(path):
+    with open(path, "rb") as f:
+        if path.endswith(".json"):
+            manifest = json.load(f)
+        else:
+            try:
+                import tomllib
+            except ImportError:
+                import tomli as tomllib
+            manifest = tomllib.load(f)
+
+    base = os.path.dirname(os.path.abspath(path))
+    charts = manifest.get("chart", [])
+    seen = set()
+    for chart in charts:
+        if chart.get("type") not in TYPES:
+            raise ValueError(f"{path}: unknown chart type {chart.get('type')!r}")
+        if chart["filename"] in seen:
+            raise ValueError(f"{path}: more than one chart named {chart['filename']!r}")
+        seen.add(chart["filename"])
+        if "input" in chart:
+            chart["input"] = os.path.join(base, chart["input"])
+        for s in chart.get("series", []):
+            s["input"] = os.path.join(base, s["input"])
+    return charts
+
+
+def inputs(chart):
+    files = [chart["input"]] if "input" in chart else []
+    files += [s["input"] for s in chart.get("series", [])]
+    return files
+
+
+def reader(chart, file):
+    if chart.get("aggregate"):
+        import aggregate
+
+        return aggregate.read
+    if any(s["input"] == file and "group" in s for s in chart.get("series", [])):
+        return module("scatter").read_groups
+    return module(chart["type"]).read
+
+
+def read_inputs(chart):
+    return {file: reader(chart, file)(file) for file in inputs(chart)}
+
+
+def build(chart, parsed=None):
+    if parsed is None:
+        parsed = read_inputs(chart)
+    kind = chart["type"]
+    kwargs = {k: v for k, v in chart.items() if k not in SPEC_KEYS}
+
+    if kind == "draw" and "input" in chart:
+        if chart.get("aggregate"):
+            data, tick = parsed[chart["input"]].table(chart["aggregate"])
+        else:
+            data, tick = parsed[chart["input"]]
+        kwargs.setdefault("data", data)
+        kwargs.setdefault("tick", tick)
+    elif kind == "stack" and "input" in chart:
+        data, categories = parsed[chart["input"]]
+        kwargs.setdefault("data", data)
+        kwargs.setdefault("categories", categories)
+        kwargs.setdefault("layout", "category")
+    elif kind == "line" and "series" in chart:
+        kwargs["data"] = [
+            (*parsed[s["input"]], s.get("color", "black")) for s in chart["series"]
+        ]
+    elif kind == "line":
+        # Inline [xs, ys] or [xs, ys, color] series, as sent to the daemon.
+        kwargs["data"] = [
+            (*s[:2], s[2] if len(s) > 2 else "black") for s in chart["data"]
+        ]
+    elif kind == "scatter" and "series" in chart:
+        kwargs["data"] = []
+        for s in chart["series"]:
+            style = {k: v for k, v in s.items() if k not in ("input", "group")}
+            columns = parsed[s["input"]]
+            if "group" in s:
+                columns = columns[s["group"]]
+                style.setdefault("label", s["group"])
+            kwargs["data"].append(module("scatter").Data(*columns, **style))
+    elif kind == "scatter":
+        # Inline series: Data keyword arguments, with xs and ys as lists.
+        kwargs["data"] = [module("scatter").Data(**s) for s in chart["data"]]
+
+    return module(kind).draw, kwargs
+
+
+def expand_variants(chart):
+    variants = [{"filename": chart["filename"]}]
+    for i, variant in enumerate(chart.get("variants", []), 1):
+        variants.append({"filename": f"{chart['filename']}-{i}", **variant})
+    return variants
+
+
+def outputs(chart):
+    paths = []
+    for variant in expand_variants(chart):
+        spec = {**chart, **variant}
+        formats = spec.get("formats") or ["pdf" if spec.get("pdf", True) else "png"]
+        paths += [f"{spec['filename']}.{fmt}" for fmt in formats]
+    return paths
+
+
+def render(chart, parsed=None, cache_dir=None):
+    if cache_dir:
+        import cache
+
+        key = cache.key(chart, module(chart["type"]))
+        if cache.fetch(cache_dir, key, outputs(chart)):
+            return [(o, os.path.getsize(o)) for o in outputs(chart)]
+
+    import instrument
+
+    trace = instrument.begin(chart["filename"])
+    try:
+        if parsed is None:
+            parsed = read_inputs(chart)
+        trace.mark("read")
+        if chart.get("variants"):
+            import variants
+
+            written = variants.render_variants(chart, expand_variants(chart), parsed)
+        else:
+            fn, kwargs = build(chart, parsed)
+            written = fn(**kwargs)
+    finally:
+        instrument.finish(trace)
+
+    if cache_dir:
+        cache.store(cache_dir, key, outputs(chart))
+    return written
+
+
+def render_bytes(chart, parsed=None):
+    import figures
+    import instrument
+
+    trace = instrument.begin(chart["filename"])
+    try:
+        if parsed is None:
+            parsed = read_inputs(chart)
+        trace.mark("read")
+        fn, kwargs = build(chart, parsed)
+        formats = [os.path.splitext(o)[1][1:] for o in outputs(chart)]
+        del kwargs["filename"]
+        kwargs.pop("formats", None)
+        return figures.render_bytes(fn, formats=formats, **kwargs)
+    finally:
+        instrument.finish(trace)
+
+
+def select(charts, names):
+    if not names:
+        return charts
+    missing = set(names) - {c["filename"] for c in charts}
+    if missing:
+        raise KeyError(f"no chart named {', '.join(sorted(missing))}")
+    return [c for c in charts if c["filename"] in names]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m render")
+    parser.add_argument("names", nargs="*", help="charts to render (default: all)")
+    parser.add_argument("-m", "--manifest", default="charts.toml")
+    parser.add_argument(
+        "-l", "--list", action="store_true", help="list charts and exit"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="worker processes (0: one per core)"
+    )
+    parser.add_argument(
+        "--cache", metavar="DIR", help="reuse outputs of unchanged charts"
+    )
+    parser.add_argument(
+        "--cache-max-mb", type=float, help="evict cache entries beyond this size"
+    )
+    parser.add_argument(
+        "--cache-max-days", type=float, help="evict cache entries unused this long"
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="parse inputs of the next N charts while rendering (with -j 1)",
+    )
+    parser.add_argument(
+        "--fixed-layout",
+        action="store_true",
+        help="reuse the measured layout of figures with the same frame and labels",
+    )
+    parser.add_argument("--report", action="store_true", help="print output file sizes")
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="keep running and re-render charts whose inputs or spec change",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=0.2, help="seconds between --watch polls"
+    )
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        import watch
+
+        return watch.watch(args.manifest, args.names, args.interval)
+
+    charts = load_manifest(args.manifest)
+    if args.list:
+        for chart in charts:
+            print(f"{chart['filename']}\t{chart['type']}")
+        return 0
+
+    try:
+        charts = select(charts, args.names)
+    except KeyError as e:
+        parser.error(e.args[0])
+    failed = 0
+    written = []
+    if args.jobs == 1:
+        import figures
+
+        layout = (
+            figures.fixed_layout() if args.fixed_layout else contextlib.nullcontext()
+        )
+        with layout:
+            if args.prefetch:
+                import batch
+
+                results = batch.render_pipelined(
+                    charts, args.prefetch, cache_dir=args.cache
+                )
+            else:
+                results = []
+                for chart in charts:
+                    written += render(chart, cache_dir=args.cache)
+    else:
+        import batch
+
+        results = batch.render_batch(
+            charts, args.jobs or None, args.cache, args.fixed_layout
+        )
+    for result in results:
+        written += result.outputs
+        if result.error:
+            failed += 1
+            print(f"{result.name}: failed\n{result.error}", file=sys.stderr)
+
+    if args.report:
+        for path, size in written:
+            print(f"{size:>12,}  {path}")
+        print(f"{sum(size for _, size in written):>12,}  total")
+
+    if args.cache and (
+        args.cache_max_mb is not None or args.cache_max_days is not None
+    ):
+        import cache
+
+        cache.evict(
+            args.cache,
+            max_bytes=args.cache_max_mb and args.cache_max_mb * 2**20,
+            max_age=args.cache_max_days and args.cache_max_days * 86400,
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,168 @@
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter, FixedLocator
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.colors import LogNorm
+from matplotlib.ticker import FixedLocator
+
+import figures
+import loader
+
+
+def _column(vs, dtype):
+    vs = np.asarray(vs)
+    if dtype is None:
+        dtype = vs.dtype if vs.dtype in (np.float32, np.float64) else np.float64
+    # No copy when the buffer already has the dtype, so memory-mapped and
+    # shared arrays stay where they are.
+    return np.asarray(vs, dtype=dtype)
 
 
 class Data:
-    def __init__(self, xs, ys, label=None, marker=None, color=None, edgecolor=None):
-        self.xs = xs
-        self.ys = ys
+    __slots__ = ("xs", "ys", "label", "marker", "color", "edgecolor")
+
+    def __init__(
+        self,
+        xs,
+        ys,
+        label=None,
+        marker=None,
+        color=None,
+        edgecolor=None,
+        dtype=None,
+    ):
+        self.xs = _column(xs, dtype)
+        self.ys = _column(ys, dtype)
+        if self.xs.shape != self.ys.shape:
+            raise ValueError(f"{len(self.xs)} x values but {len(self.ys)} y values")
         self.marker = marker
         self.label = label
         self.color = color
         self.edgecolor = edgecolor
 
+    @classmethod
+    def groups(cls, file, styles=None, **kwargs):
+        styles = styles or {}
+        return [
+            cls(xs, ys, **{"label": group, **kwargs, **styles.get(group, {})})
+            for group, (xs, ys) in read_groups(file).items()
+        ]
+
+
+def _bins(vs, edges, log):
+    if log:
+        vs, edges = np.log(vs), np.log(edges)
+    span = edges[-1] - edges[0]
+    if span <= 0:
+        return np.zeros(len(vs), dtype=np.intp)
+    n = len(edges) - 1
+    return np.minimum(((vs - edges[0]) * (n / span)).astype(np.intp), n - 1)
+
+
+def _visible(data, ylog):
+    # Points in CHUNK-row pieces, so memory-mapped series are never
+    # converted whole.
+    for d in data:
+        for i in range(0, len(d.xs), loader.CHUNK):
+            xs = np.asarray(d.xs[i : i + loader.CHUNK], dtype=float)
+            ys = np.asarray(d.ys[i : i + loader.CHUNK], dtype=float)
+            visible = np.isfinite(xs) & np.isfinite(ys)
+            if ylog:
+                visible &= ys > 0
+            yield xs[visible], ys[visible]
+
+
+def _density(ax, data, kind, gridsize, ylog, cmap):
+    if kind == "hexbin":
+        parts = list(_visible(data, ylog))
+        xs = np.concatenate([xs for xs, _ in parts] or [np.empty(0)])
+        ys = np.concatenate([ys for _, ys in parts] or [np.empty(0)])
+        if len(xs) == 0:
+            return
+        ax.hexbin(
+            xs,
+            ys,
+            gridsize=gridsize,
+            bins="log",
+            mincnt=1,
+            yscale="log" if ylog else "linear",
+            cmap=cmap,
+        )
+        return
+    if kind != "hist2d":
+        raise ValueError(f"unknown density mode {kind!r}")
+
+    ranges = np.array(
+        [
+            (xs.min(), xs.max(), ys.min(), ys.max())
+            for xs, ys in _visible(data, ylog)
+            if len(xs)
+        ]
+    )
+    if len(ranges) == 0:
+        return
+    xmin, ymin = ranges[:, 0].min(), ranges[:, 2].min()
+    xmax, ymax = ranges[:, 1].max(), ranges[:, 3].max()
+    xedges = np.linspace(xmin, xmax, gridsize + 1)
+    if ylog:
+        yedges = np.geomspace(ymin, ymax, gridsize + 1)
+    else:
+        yedges = np.linspace(ymin, ymax, gridsize + 1)
+    counts = np.zeros(gridsize * gridsize, dtype=np.int64)
+    for xs, ys in _visible(data, ylog):
+        ix = _bins(xs, xedges, False)
+        iy = _bins(ys, yedges, ylog)
+        counts += np.bincount(iy * gridsize + ix, minlength=gridsize * gridsize)
+    counts = np.ma.masked_equal(counts.reshape(gridsize, gridsize), 0)
+    ax.pcolormesh(xedges, yedges, counts, norm=LogNorm(), cmap=cmap)
+
+
+def restyle(
+    ax,
+    data,
+    colors=None,
+    edgecolors=None,
+    legend=False,
+    legend_loc="upper left",
+    legend_bbox=None,
+    pointsize=60,
+    pointalpha=0.7,
+    edgewidth=1,
+    fontsize=18,
+    facecolor="white",
+    labelcolor="black",
+    tickcolor="black",
+    bordercolor="black",
+    tickwidth=1,
+    borderwidth=1,
+    borders=["left", "right", "top", "bottom"],
+):
+    colors = colors or [d.color for d in data]
+    edgecolors = edgecolors or [d.edgecolor for d in data]
+    # Density plots have no per-point artists to restyle.
+    points = [c for c in ax.collections if isinstance(c, PathCollection)]
+    for c, color, edgecolor in zip(points, colors, edgecolors):
+        if color is not None:
+            c.set_facecolor(color)
+        if edgecolor is not None:
+            c.set_edgecolor(edgecolor)
+        c.set_sizes([pointsize])
+        c.set_alpha(pointalpha)
+        c.set_linewidths(edgewidth)
+
+    figures.style_axes(
+        ax,
+        legend,
+        legend_loc,
+        legend_bbox,
+        fontsize,
+        facecolor,
+        labelcolor,
+        tickcolor,
+        bordercolor,
+        tickwidth,
+        borderwidth,
+        borders,
+    )
+
 
 def draw(
     data,
@@ -38,131 +190,101 @@ def draw(
     borders=["left", "right", "top", "bottom"],
     pdf=True,
     dpi=300,
+    formats=None,
+    density=None,
+    density_threshold=100000,
+    gridsize=200,
+    cmap="viridis",
+    rasterize_threshold=None,
+    rasterize_dpi=300,
+    ax=None,
 ):
-    fig = plt.figure(figsize=(width, height), facecolor=facecolor)
-    ax = fig.add_subplot(1, 1, 1, facecolor=facecolor)
+    if density is None and sum(len(d.xs) for d in data) > density_threshold:
+        density = "hist2d"
 
-    for d in data:
-        ax.scatter(
-            d.xs,
-            d.ys,
-            s=pointsize,
-            alpha=pointalpha,
-            edgecolors=d.edgecolor,
-            linewidths=edgewidth,
-            marker=d.marker,
-            label=d.label,
-            color=d.color,
-        )
+    fig, ax = figures.new(width, height, facecolor, ax)
+    try:
+        if density:
+            _density(ax, data, density, gridsize, ylog, cmap)
+        else:
+            for d in data:
+                ax.scatter(
+                    d.xs,
+                    d.ys,
+                    s=pointsize,
+                    alpha=pointalpha,
+                    edgecolors=d.edgecolor,
+                    linewidths=edgewidth,
+                    marker=d.marker,
+                    label=d.label,
+                    color=d.color,
+                )
 
-    if legend:
-        ax.legend(fontsize=fontsize, loc=legend_loc, bbox_to_anchor=legend_bbox)
+        if ylog:
+            ax.set_yscale("log")
 
-    if ylog:
-        ax.set_yscale("log")
-
-    if x_tick_positions:
-        ax.xaxis.set_major_locator(FixedLocator(x_tick_positions))
-        ax.xaxis.set_minor_locator(FixedLocator([]))
-    if y_tick_positions:
-        ax.yaxis.set_major_locator(FixedLocator(y_tick_positions))
-        ax.yaxis.set_minor_locator(FixedLocator([]))
-
-    if xlabel:
-        ax.xaxis.label.set_color(labelcolor)
-        ax.set_xlabel(xlabel, fontsize=fontsize)
-    if ylabel:
-        ax.yaxis.label.set_color(labelcolor)
-        ax.set_ylabel(ylabel, fontsize=fontsize)
-
-    ax.tick_params(axis="x", labelsize=fontsize, colors=tickcolor, width=tickwidth)
-    ax.tick_params(axis="y", labelsize=fontsize, colors=tickcolor, width=tickwidth)
-
-    for b in borders:
-        ax.spines[b].set_color(bordercolor)
-        ax.spines[b].set_linewidth(borderwidth)
-    for b in ["left", "right", "top", "bottom"]:
-        if b not in borders:
-            ax.spines[b].set_visible(False)
-
-    if pdf:
-        fn = f"{filename}.pdf"
-        plt.savefig(fn, bbox_inches="tight", pad_inches=0.05)
-    else:
-        fn = f"{filename}.png"
-        plt.savefig(fn, dpi=dpi, bbox_inches="tight", pad_inches=0.05)
+        if x_tick_positions:
+            ax.xaxis.set_major_locator(FixedLocator(x_tick_positions))
+            ax.xaxis.set_minor_locator(FixedLocator([]))
+        if y_tick_positions:
+            ax.yaxis.set_major_locator(FixedLocator(y_tick_positions))
+            ax.yaxis.set_minor_locator(FixedLocator([]))
+
+        if xlabel:
+            ax.set_xlabel(xlabel)
+        if ylabel:
+            ax.set_ylabel(ylabel)
+
+        restyle(
+            ax,
+            data,
+            legend=legend,
+            legend_loc=legend_loc,
+            legend_bbox=legend_bbox,
+            pointsize=pointsize,
+            pointalpha=pointalpha,
+            edgewidth=edgewidth,
+            fontsize=fontsize,
+            facecolor=facecolor,
+            labelcolor=labelcolor,
+            tickcolor=tickcolor,
+            bordercolor=bordercolor,
+            tickwidth=tickwidth,
+            borderwidth=borderwidth,
+            borders=borders,
+        )
+
+        return figures.save(
+            fig, filename, pdf, dpi, rasterize_threshold, rasterize_dpi, formats
+        )
+    finally:
+        figures.release(fig)
 
 
 def read(file):
-    xs = []
-    ys = []
-    with open(file, "r") as f:
-        for line in f:
-            line = line.split()
-            xs.append(float(line[0]))
-            ys.append(float(line[1]))
-    return xs, ys
-
-color = "black"
-# color = "#2e3c7e"
-
-# xs, ys = read("qtime.txt")
-# d = Data(xs, ys)
-# draw([d], "qtime", width=12, height=5, fontsize=18, xlabel="Qubits", ylabel="Time (s)")
-
-# xs, ys = read("ctime.txt")
-# d1 = Data(xs, ys, color="blue", marker="o", label="Concrat")
-# xs, ys = read("gtime.txt")
-# d2 = Data(xs, ys, color="red", marker="^", label="Goblint")
-# draw(
-#     [d1, d2],
-#     "atime",
-#     width=5,
-#     height=3,
-#     pointsize=100,
-#     fontsize=20,
-#     xlabel="Rust LOC",
-#     ylabel="Time (s)",
-#     legend=True,
-#     legend_loc="upper right",
-#     ylog=True,
-# )
-
-xs, ys = read("nopcrat-atime.txt")
-d1 = Data(xs, ys, color="gray", edgecolor="black", marker="o")
-draw(
-    [d1],
-    "atime",
-    width=8,
-    height=2.5,
-    pointsize=80,
-    fontsize=16,
-    xlabel="Rust LOC",
-    ylabel="Time (s)",
-    x_tick_positions=[0, 50000, 100000, 150000],
-    y_tick_positions=[0, 50, 100, 150, 200],
-    # tickcolor=color,
-    # labelcolor=color,
-    # bordercolor=color,
-    # borders=["left", "bottom"],
-    # tickwidth=2,
-    # borderwidth=2,
-    # edgewidth=1.5,
-    # pointalpha=1,
-    # pdf=False,
-)
-
-xs, ys = read("nopcrat-ttime.txt")
-d1 = Data(xs, ys, color="gray", edgecolor="black", marker="o")
-draw(
-    [d1],
-    "ttime",
-    width=8,
-    height=2.5,
-    pointsize=80,
-    fontsize=16,
-    xlabel="Rust LOC",
-    ylabel="Time (s)",
-    x_tick_positions=[0, 50000, 100000, 150000],
-    y_tick_positions=[0, 0.5, 1, 1.5],
-)
+    values = loader.load(file)
+    if values.size == 0:
+        return np.empty(0), np.empty(0)
+    return values[:, 0], values[:, 1]
+
+
+def read_groups(file):
+    # "series x y" rows, many series in one file. When each series' rows are
+    # contiguous, the columns come back as views of the parsed array.
+    labels, values = loader.load(file, labeled=True)
+    if len(labels) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    if len(starts) != len(np.unique(labels)):
+        unique, first, inverse = np.unique(
+            labels, return_index=True, return_inverse=True
+        )
+        rank = np.argsort(np.argsort(first))
+        order = np.argsort(rank[inverse], kind="stable")
+        labels, values = labels[order], values[order]
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)]
+    return {
+        str(labels[i]): (values[i:j, 0], values[i:j, 1])
+        for i, j in zip(starts.tolist(), ends.tolist())
+    }
@@ -0,0 +1,69 @@
+import inspect
+
+import figures
+import render
+
+# Keys that choose where a variant is written rather than how it looks.
+OUTPUT_KEYS = {
+    "filename",
+    "pdf",
+    "dpi",
+    "formats",
+    "rasterize_threshold",
+    "rasterize_dpi",
+}
+
+
+def _defaults(fn):
+    return {
+        name: p.default
+        for name, p in inspect.signature(fn).parameters.items()
+        if p.default is not inspect.Parameter.empty
+    }
+
+
+def _save(fig, params):
+    return figures.save(
+        fig,
+        params["filename"],
+        params["pdf"],
+        params["dpi"],
+        params["rasterize_threshold"],
+        params["rasterize_dpi"],
+        params["formats"],
+    )
+
+
+def render_variants(chart, variants, parsed=None):
+    if parsed is None:
+        parsed = render.read_inputs(chart)
+    draw, kwargs = render.build(chart, parsed)
+    restyle = getattr(render.module(chart["type"]), "restyle", None)
+    styles = set()
+    if restyle is not None:
+        styles = set(inspect.signature(restyle).parameters) - {"ax", "data"}
+
+    written = [None] * len(variants)
+    restyled = []
+    for i, variant in enumerate(variants):
+        if restyle is not None and set(variant) - OUTPUT_KEYS <= styles:
+            restyled.append(i)
+        else:
+            # More than styling changes, or a chart that cannot be restyled:
+            # draw it afresh from the parsed data.
+            written[i] = draw(**{**kwargs, **variant})
+
+    if restyled:
+        # Build the data artists once; each variant only restyles them.
+        params = {**_defaults(draw), **kwargs}
+        fig, ax = figures.new(params["width"], params["height"], params["facecolor"])
+        try:
+            draw(**{**kwargs, "ax": ax})
+            for i in restyled:
+                spec = {**params, **variants[i]}
+                restyle(ax, params["data"], **{k: spec[k] for k in styles if k in spec})
+                fig.set_facecolor(spec["facecolor"])
+                written[i] = _save(fig, spec)
+        finally:
+            figures.release(fig)
+    return [output for outputs in written for output in outputs]
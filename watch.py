@@ -0,0 +1,125 @@
+import importlib
+import os
+import sys
+import time
+import traceback
+
+import render
+
+# Reloaded in this order when their source changes; chart modules read
+# helpers through module attributes, so in-place reloads reach them.
+HELPERS = ("instrument", "loader", "decimate", "aggregate", "figures")
+MODULES = HELPERS + render.TYPES + ("render",)
+# Modules whose readers produced the cached arrays.
+READERS = {"loader", "aggregate"} | set(render.TYPES)
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _spec(chart):
+    return repr(sorted(chart.items()))
+
+
+class Watcher:
+    def __init__(self, manifest, names=()):
+        self.manifest = manifest
+        self.names = names
+        self.charts = []
+        self.specs = {}
+        self.parsed = {}
+        self.stamps = {}
+
+    def _changed(self, paths, new=True):
+        changed = set()
+        for path in paths:
+            stamp = _stamp(path)
+            if self.stamps.get(path, stamp if not new else None) != stamp:
+                changed.add(path)
+            self.stamps[path] = stamp
+        return changed
+
+    def _sources(self):
+        return {
+            sys.modules[name].__file__: name for name in MODULES if name in sys.modules
+        }
+
+    def _reload(self):
+        sources = self._sources()
+        # Modules seen for the first time were just imported, not edited.
+        changed = [sources[path] for path in self._changed(sources, new=False)]
+        for name in MODULES:
+            if name in changed:
+                importlib.reload(sys.modules[name])
+        if READERS.intersection(changed):
+            self.parsed.clear()
+        if set(changed) - set(render.TYPES):
+            return {c["filename"] for c in self.charts}
+        return {c["filename"] for c in self.charts if c["type"] in changed}
+
+    def _load(self):
+        if not self._changed([self.manifest]):
+            return set()
+        try:
+            charts = render.select(render.load_manifest(self.manifest), self.names)
+        except Exception:
+            traceback.print_exc()
+            return set()
+        specs = {c["filename"]: _spec(c) for c in charts}
+        dirty = {n for n, spec in specs.items() if self.specs.get(n) != spec}
+        self.charts, self.specs = charts, specs
+        return dirty
+
+    def _inputs(self):
+        files = {f for c in self.charts for f in render.inputs(c)}
+        for key in [k for k in self.parsed if k[0] not in files]:
+            del self.parsed[key]
+        changed = self._changed(files)
+        for key in [k for k in self.parsed if k[0] in changed]:
+            del self.parsed[key]
+        return {
+            c["filename"] for c in self.charts if changed.intersection(render.inputs(c))
+        }
+
+    def _read(self, chart):
+        parsed = {}
+        for file in render.inputs(chart):
+            read = render.reader(chart, file)
+            key = (file, read.__module__, read.__qualname__)
+            if key not in self.parsed:
+                self.parsed[key] = read(file)
+            parsed[file] = self.parsed[key]
+        return parsed
+
+    def poll(self):
+        dirty = self._reload() | self._load() | self._inputs()
+        rendered = []
+        for chart in self.charts:
+            if chart["filename"] not in dirty:
+                continue
+            start = time.perf_counter()
+            try:
+                render.render(chart, self._read(chart))
+            except Exception:
+                print(f"{chart['filename']}: failed", file=sys.stderr)
+                traceback.print_exc()
+                continue
+            elapsed = time.perf_counter() - start
+            print(f"{chart['filename']}: {elapsed:.2f}s", file=sys.stderr)
+            rendered.append(chart["filename"])
+        return rendered
+
+
+def watch(manifest, names=(), interval=0.2):
+    watcher = Watcher(manifest, names)
+    try:
+        while True:
+            watcher.poll()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0